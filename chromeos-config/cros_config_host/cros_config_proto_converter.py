@@ -10,6 +10,7 @@
 import argparse
 import collections
 import collections.abc
+import concurrent.futures
 import functools
 import glob
 import hashlib
@@ -19,6 +20,7 @@ import os
 import pathlib
 import pprint
 import re
+import struct
 import sys
 
 # pylint: disable=import-error
@@ -68,6 +70,27 @@ ConfigFiles = collections.namedtuple(
     ],
 )
 
+
+class LookupFailedError(Exception):
+    """Exception raised when a referenced ID is missing from the config.
+
+    Attributes:
+        id_type: Kind of ID that failed to resolve, e.g. "Program".
+    """
+
+    def __init__(self, id_type, value):
+        super().__init__(f"Failed to lookup {id_type} with value: {value}")
+        self.id_type = id_type
+
+
+class MissingSoftwareConfigError(ValueError):
+    """Exception raised when a design config has no software config."""
+
+
+class DuplicateSoftwareConfigError(ValueError):
+    """Exception raised when a design config has multiple software configs."""
+
+
 CAMERA_CONFIG_DEST_PATH_TEMPLATE = "/etc/camera/camera_config_{}.json"
 CAMERA_CONFIG_SOURCE_PATH_TEMPLATE = (
     "sw_build_config/platform/chromeos-config/camera/camera_config_{}.json"
@@ -77,6 +100,8 @@ DTD_FILE = "media_profiles.dtd"
 DPTF_PATH = "sw_build_config/platform/chromeos-config/thermal"
 DPTF_FILE = "dptf.dv"
 
+PROJECT_NAME_RE = re.compile(r".*/([\w-]*)/(public_)?sw_build_config/.*")
+
 PROXIMITY_SEMTECH_CONFIG_TEMPLATE = "semtech_config_{}.json"
 
 TOUCH_PATH = "sw_build_config/platform/chromeos-config/touch"
@@ -2636,15 +2661,14 @@ def _lookup(id_value, id_map):
     key = id_value.value
     if key in id_map:
         return id_map[id_value.value]
-    error = "Failed to lookup %s with value: %s" % (
-        id_value.__class__.__name__.replace("Id", ""),
-        key,
+    error = LookupFailedError(
+        id_value.__class__.__name__.replace("Id", ""), key
     )
     print(error)
     print("Check the config contents provided:")
     printer = pprint.PrettyPrinter(indent=4)
     printer.pprint(id_map)
-    raise Exception(error)
+    raise error
 
 
 def _build_touch_file_config(config, project_name):
@@ -2786,10 +2810,12 @@ def _sw_config(sw_configs, design_config_id):
     if len(sw_config_matches) == 1:
         return sw_config_matches[0]
     if len(sw_config_matches) > 1:
-        raise ValueError(
+        raise DuplicateSoftwareConfigError(
             "Multiple software configs found for: %s" % design_config_id
         )
-    raise ValueError("Software config is required for: %s" % design_config_id)
+    raise MissingSoftwareConfigError(
+        "Software config is required for: %s" % design_config_id
+    )
 
 
 def _is_custom_label(device_brands):
@@ -3018,13 +3044,17 @@ def _any_present(features):
     return topology_pb2.HardwareFeatures.PRESENT in features
 
 
-def _get_formatted_config_id(design_config):
-    return design_config.id.value.lower().replace(":", "_")
-
-
 def _write_file(output_dir, file_name, file_content):
     os.makedirs(output_dir, exist_ok=True)
     output = os.path.join(output_dir, file_name)
+    # Leave the file untouched if it is already up to date, so its mtime stays
+    # stable across incremental rebuilds.
+    try:
+        with open(output, "rb") as f:
+            if f.read() == file_content:
+                return
+    except FileNotFoundError:
+        pass
     with open(output, "wb") as f:
         f.write(file_content)
 
@@ -3341,6 +3371,7 @@ def _per_config_file_writer(
     system_dir,
     file_name_template,
     generate_file_content,
+    write_file=None,
 ):
     """Writes generated files on demand.
 
@@ -3354,11 +3385,14 @@ def _per_config_file_writer(
                             e.g. 'config_{}.xml'.
         generate_file_content: Function to generate config file content from
         HardwareFeatures and SoftwareConfig proto.
+        write_file: Function used to write out the generated content, with the
+            same signature as _write_file.  Defaults to _write_file.
 
     Returns:
         A function mapping from config to its corresponding file entry.
     """
     configs_generated = {}
+    write_file = write_file or _write_file
 
     def _add_config(config):
         config_content = generate_file_content(
@@ -3372,7 +3406,7 @@ def _per_config_file_writer(
         content_hash = hashlib.sha256(config_content).hexdigest()[:8]
         if content_hash not in configs_generated:
             file_name = file_name_template.format(content_hash)
-            _write_file(output_dir, file_name, config_content)
+            write_file(output_dir, file_name, config_content)
 
             configs_generated[content_hash] = _file_v2(
                 os.path.join(build_dir, file_name),
@@ -3383,23 +3417,29 @@ def _per_config_file_writer(
     return _add_config
 
 
-def _arc_hardware_feature_file_writer(output_root_dir, build_root_dir):
+def _arc_hardware_feature_file_writer(
+    output_root_dir, build_root_dir, write_file=None
+):
     return _per_config_file_writer(
         os.path.join(output_root_dir, "arc"),
         os.path.join(build_root_dir, "arc"),
         "/etc",
         "hardware_features_{}.xml",
         _generate_arc_hardware_features,
+        write_file=write_file,
     )
 
 
-def _arc_media_profile_file_writer(output_root_dir, build_root_dir, dtd_path):
+def _arc_media_profile_file_writer(
+    output_root_dir, build_root_dir, dtd_path, write_file=None
+):
     return _per_config_file_writer(
         os.path.join(output_root_dir, "arc"),
         os.path.join(build_root_dir, "arc"),
         "/etc",
         "media_profiles_{}.xml",
         functools.partial(_generate_arc_media_profiles, dtd_path=dtd_path),
+        write_file=write_file,
     )
 
 
@@ -3436,12 +3476,19 @@ def _camera_map(configs, project_name):
         map from design name to camera config.
     """
     result = {}
+    # Scan the camera config directory once rather than checking for each
+    # design's file separately.
+    config_dir = os.path.dirname(CAMERA_CONFIG_SOURCE_PATH_TEMPLATE)
+    if os.path.isdir(config_dir):
+        existing_files = {entry.name for entry in os.scandir(config_dir)}
+    else:
+        existing_files = set()
     for design in configs.design_list:
         design_name = design.name
         config_path = CAMERA_CONFIG_SOURCE_PATH_TEMPLATE.format(
             design_name.lower()
         )
-        if os.path.exists(config_path):
+        if os.path.basename(config_path) in existing_files:
             destination = CAMERA_CONFIG_DEST_PATH_TEMPLATE.format(
                 design_name.lower()
             )
@@ -3473,25 +3520,21 @@ def _dptf_map(project_name):
         map from design name or empty string (project wide), to dptf config.
     """
     result = {}
+    project_dptf_dir = os.path.join(project_name, DPTF_PATH)
     for file in glob.iglob(
         os.path.join(DPTF_PATH, "**", DPTF_FILE), recursive=True
     ):
         relative_path = os.path.dirname(file).partition(DPTF_PATH)[2].strip("/")
         if relative_path:
-            project_dptf_path = os.path.join(
-                project_name, relative_path, DPTF_FILE
-            )
+            project_dptf_path = f"{project_name}/{relative_path}/{DPTF_FILE}"
+            source_path = f"{project_dptf_dir}/{relative_path}/{DPTF_FILE}"
         else:
-            project_dptf_path = os.path.join(project_name, DPTF_FILE)
+            project_dptf_path = f"{project_name}/{DPTF_FILE}"
+            source_path = f"{project_dptf_dir}/{DPTF_FILE}"
         dptf_file = {
             "dptf-dv": project_dptf_path,
             "files": [
-                _file(
-                    os.path.join(
-                        project_name, DPTF_PATH, relative_path, DPTF_FILE
-                    ),
-                    os.path.join("/etc/dptf", project_dptf_path),
-                )
+                _file(source_path, f"/etc/dptf/{project_dptf_path}"),
             ],
         }
         result[relative_path] = dptf_file
@@ -3597,6 +3640,9 @@ def _wifi_sar_map(configs, output_dir, build_root_dir):
     # pylint: disable=too-many-locals
     result = {}
     sw_configs = list(configs.software_configs)
+    wifi_output_dir = os.path.join(output_dir, "wifi")
+    wifi_build_dir = os.path.join(build_root_dir, "wifi")
+    created_dirs = set()
     for hw_design in configs.design_list:
         for hw_design_config in hw_design.configs:
             wifi = hw_design_config.hardware_features.wifi
@@ -3620,13 +3666,13 @@ def _wifi_sar_map(configs, output_dir, build_root_dir):
                 wifi_sar_id = _extract_fw_config_value(
                     hw_design_config, hw_design_config.hardware_topology.wifi
                 )
-                output_path = os.path.join(output_dir, "wifi", coreboot_target)
-                os.makedirs(output_path, exist_ok=True)
+                target_output_dir = f"{wifi_output_dir}/{coreboot_target}"
+                if target_output_dir not in created_dirs:
+                    os.makedirs(target_output_dir, exist_ok=True)
+                    created_dirs.add(target_output_dir)
                 filename = f"wifi_sar_{wifi_sar_id}.hex"
-                output_path = os.path.join(output_path, filename)
-                build_path = os.path.join(
-                    build_root_dir, "wifi", coreboot_target, filename
-                )
+                output_path = f"{target_output_dir}/{filename}"
+                build_path = f"{wifi_build_dir}/{coreboot_target}/{filename}"
                 if os.path.exists(output_path):
                     with open(output_path, "rb") as f:
                         if f.read() != sar_file_content:
@@ -3638,8 +3684,8 @@ def _wifi_sar_map(configs, output_dir, build_root_dir):
                 else:
                     with open(output_path, "wb") as f:
                         f.write(sar_file_content)
-                system_path = os.path.join(
-                    "/firmware/cbfs-rw-raw", coreboot_target, filename
+                system_path = (
+                    f"/firmware/cbfs-rw-raw/{coreboot_target}/{filename}"
                 )
                 result[(coreboot_target, wifi_sar_id)] = {
                     "sar-file": _file_v2(build_path, system_path)
@@ -3665,54 +3711,75 @@ def _extract_fw_config_value(hw_design_config, topology):
         )
 
     fw_config = hw_design_config.hardware_features.fw_config.value
-    value = fw_config & mask
-    lsb_bit_set = (~mask + 1) & mask
-    return value // lsb_bit_set
+    # Shift the masked value down by the number of trailing zeros in the mask.
+    shift = (mask & -mask).bit_length() - 1
+    return (fw_config & mask) >> shift
+
+
+_UINT8 = struct.Struct("<B")
+_UINT16 = struct.Struct("<H")
+_UINT32 = struct.Struct("<I")
+
+# Version, selection and list size followed by the deny list entries.
+_WTAS_DENY_LIST_ENTRIES = 16
+_WTAS_STRUCT = struct.Struct(f"<BBB{_WTAS_DENY_LIST_ENTRIES}H")
 
 
 def hex_8bit(value):
-    """Converts 8bit value into bytearray.
+    """Converts 8bit value into little-endian bytes.
 
     args:
       8bit value
 
     returns:
-      bytearray of size 1
+      bytes of size 1
+
+    raises:
+      Exception if the value does not fit in 8 bits.
     """
 
-    if value > 0xFF or value < 0:
-        raise Exception(f"Sar file 8bit value {value} out of range")
-    return value.to_bytes(1, "little")
+    try:
+        return _UINT8.pack(value)
+    except struct.error as e:
+        raise Exception(f"Sar file 8bit value {value} out of range") from e
 
 
 def hex_16bit(value):
-    """Converts 16bit value into bytearray.
+    """Converts 16bit value into little-endian bytes.
 
     args:
       16bit value
 
     returns:
-      bytearray of size 2
+      bytes of size 2
+
+    raises:
+      Exception if the value does not fit in 16 bits.
     """
 
-    if value > 0xFFFF or value < 0:
-        raise Exception(f"Sar file 16bit value {value} out of range")
-    return value.to_bytes(2, "little")
+    try:
+        return _UINT16.pack(value)
+    except struct.error as e:
+        raise Exception(f"Sar file 16bit value {value} out of range") from e
 
 
 def hex_32bit(value):
-    """Converts 32bit value into bytearray.
+    """Converts 32bit value into little-endian bytes.
 
     args:
       32bit value
 
     returns:
-      bytearray of size 4
+      bytes of size 4
+
+    raises:
+      Exception if the value does not fit in 32 bits.
     """
 
-    if value > 0xFFFFFFFF or value < 0:
-        raise Exception(f"Sar file 32bit value {value} out of range")
-    return value.to_bytes(4, "little")
+    try:
+        return _UINT32.pack(value)
+    except struct.error as e:
+        raise Exception(f"Sar file 32bit value {value} out of range") from e
 
 
 def wrds_ewrd_encode(sar_table_config):
@@ -3947,34 +4014,31 @@ def wtas_encode(wtas_config):
       Encoded time average sar tables as bytearray
     """
 
-    if wtas_config.tas_list_size > 16:
+    if wtas_config.tas_list_size > _WTAS_DENY_LIST_ENTRIES:
         raise Exception(f"Invalid deny list size {wtas_config.tas_list_size}")
 
     if wtas_config.sar_avg_version == 0xFFFF:
         return bytearray(0)
 
     if wtas_config.sar_avg_version in (0, 1):
-        return (
-            hex_8bit(wtas_config.sar_avg_version)
-            + hex_8bit(wtas_config.tas_selection)
-            + hex_8bit(wtas_config.tas_list_size)
-            + hex_16bit(wtas_config.deny_list_entry_1)
-            + hex_16bit(wtas_config.deny_list_entry_2)
-            + hex_16bit(wtas_config.deny_list_entry_3)
-            + hex_16bit(wtas_config.deny_list_entry_4)
-            + hex_16bit(wtas_config.deny_list_entry_5)
-            + hex_16bit(wtas_config.deny_list_entry_6)
-            + hex_16bit(wtas_config.deny_list_entry_7)
-            + hex_16bit(wtas_config.deny_list_entry_8)
-            + hex_16bit(wtas_config.deny_list_entry_9)
-            + hex_16bit(wtas_config.deny_list_entry_10)
-            + hex_16bit(wtas_config.deny_list_entry_11)
-            + hex_16bit(wtas_config.deny_list_entry_12)
-            + hex_16bit(wtas_config.deny_list_entry_13)
-            + hex_16bit(wtas_config.deny_list_entry_14)
-            + hex_16bit(wtas_config.deny_list_entry_15)
-            + hex_16bit(wtas_config.deny_list_entry_16)
+        header = (
+            wtas_config.sar_avg_version,
+            wtas_config.tas_selection,
+            wtas_config.tas_list_size,
         )
+        deny_list = [
+            getattr(wtas_config, f"deny_list_entry_{i}")
+            for i in range(1, _WTAS_DENY_LIST_ENTRIES + 1)
+        ]
+        try:
+            return _WTAS_STRUCT.pack(*header, *deny_list)
+        except struct.error:
+            # Encode field by field to report the value that is out of range.
+            for value in header:
+                hex_8bit(value)
+            for value in deny_list:
+                hex_16bit(value)
+            raise
 
     raise Exception(
         f"Invalid time average table revision {wtas_config.sar_avg_version}"
@@ -4018,9 +4082,7 @@ def dsm_encode(dsm_config):
         return supported_functions
 
     def dsm_value(value):
-        if value < 0:
-            return hex_32bit(0)
-        return value.to_bytes(4, "little")
+        return hex_32bit(max(value, 0))
 
     supported_functions = enable_supported_functions(dsm_config)
     if supported_functions == 0:
@@ -4135,9 +4197,7 @@ def Main(
     build_root_dir = output_dir
     if "sw_build_config" in output_dir:
         full_path = os.path.realpath(output)
-        project_name = re.match(
-            r".*/([\w-]*)/(public_)?sw_build_config/.*", full_path
-        ).groups(1)[0]
+        project_name = PROJECT_NAME_RE.match(full_path).group(1)
         # Projects don't know about each other until they are integrated into
         # the build system.  When this happens, the files need to be able to
         # co-exist without any collisions.  This prefixes the project name
@@ -4156,24 +4216,39 @@ def Main(
     wifi_sar_map = _wifi_sar_map(configs, output_dir, build_root_dir)
     if os.path.exists(TOUCH_PATH):
         touch_fw = _build_touch_file_config(configs, project_name)
-    arc_hw_feature_file_writer = _arc_hardware_feature_file_writer(
-        output_dir, build_root_dir
-    )
-    arc_media_profile_file_writer = _arc_media_profile_file_writer(
-        output_root_dir=output_dir,
-        build_root_dir=build_root_dir,
-        dtd_path=dtd_path,
-    )
-    config_files = ConfigFiles(
-        arc_hw_features=arc_hw_feature_file_writer,
-        arc_media_profiles=arc_media_profile_file_writer,
-        touch_fw=touch_fw,
-        dptf_map=dptf_map,
-        camera_map=camera_map,
-        wifi_sar_map=wifi_sar_map,
-        proximity_map=proximity_map,
-    )
-    write_output(_transform_build_configs(configs, config_files), output)
+
+    # The ARC files are written as they are generated during the transform.
+    # Each file is written once (they are deduplicated by content hash), so
+    # the writes are independent and are overlapped on a thread pool.
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        pending_writes = []
+
+        def _write_file_async(*args):
+            pending_writes.append(executor.submit(_write_file, *args))
+
+        arc_hw_feature_file_writer = _arc_hardware_feature_file_writer(
+            output_dir, build_root_dir, write_file=_write_file_async
+        )
+        arc_media_profile_file_writer = _arc_media_profile_file_writer(
+            output_root_dir=output_dir,
+            build_root_dir=build_root_dir,
+            dtd_path=dtd_path,
+            write_file=_write_file_async,
+        )
+        config_files = ConfigFiles(
+            arc_hw_features=arc_hw_feature_file_writer,
+            arc_media_profiles=arc_media_profile_file_writer,
+            touch_fw=touch_fw,
+            dptf_map=dptf_map,
+            camera_map=camera_map,
+            wifi_sar_map=wifi_sar_map,
+            proximity_map=proximity_map,
+        )
+        build_configs = _transform_build_configs(configs, config_files)
+        # Surface any exception raised while writing.
+        for write in pending_writes:
+            write.result()
+    write_output(build_configs, output)
 
 
 def main(argv=None):
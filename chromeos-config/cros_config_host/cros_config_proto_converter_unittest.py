@@ -7,11 +7,14 @@
 
 # pylint: disable=missing-docstring,protected-access
 
+import difflib
+import filecmp
+import functools
 import pathlib
-import subprocess
 import unittest
 
 # pylint: disable=import-error
+from chromiumos.config.payload import config_bundle_pb2
 from chromiumos.config.test import fake_config as fake_config_mod
 import cros_config_proto_converter
 
@@ -28,7 +31,8 @@ PROGRAM_CONFIG_FILE = fake_config_mod.FAKE_PROGRAM_CONFIG
 PROJECT_CONFIG_FILE = fake_config_mod.FAKE_PROJECT_CONFIG
 
 
-def fake_config():
+@functools.lru_cache(maxsize=None)
+def _fake_config_template():
     return cros_config_proto_converter._merge_configs(
         [
             cros_config_proto_converter._read_config(PROGRAM_CONFIG_FILE),
@@ -37,6 +41,70 @@ def fake_config():
     )
 
 
+def fake_config():
+    # The fake config files are only read and merged once, each caller gets its
+    # own copy that it is free to modify.
+    config = config_bundle_pb2.ConfigBundle()
+    config.CopyFrom(_fake_config_template())
+    return config
+
+
+def _diff_trees(expected_dir, actual_dir):
+    """Compares two directory trees in the style of `diff -ru`.
+
+    Args:
+        expected_dir: pathlib.Path to the expected tree.
+        actual_dir: pathlib.Path to the tree to check.
+
+    Returns:
+        A description of the differences, or the empty string if none.
+    """
+    return "".join(
+        _diff_dircmp(filecmp.dircmp(expected_dir, actual_dir, ignore=[]))
+    )
+
+
+def _diff_dircmp(cmp):
+    """Yields the differences found by a filecmp.dircmp, recursively."""
+    expected_dir = pathlib.Path(cmp.left)
+    actual_dir = pathlib.Path(cmp.right)
+    for name in sorted(cmp.left_only):
+        yield f"Only in {expected_dir}: {name}\n"
+    for name in sorted(cmp.right_only):
+        yield f"Only in {actual_dir}: {name}\n"
+    for name in sorted(cmp.common_funny):
+        expected_path = expected_dir / name
+        actual_path = actual_dir / name
+        yield (
+            f"File {expected_path} is a {_file_kind(expected_path)} while "
+            f"file {actual_path} is a {_file_kind(actual_path)}\n"
+        )
+    # Compare contents directly, dircmp only compares os.stat() signatures.
+    for name in sorted(cmp.common_files):
+        expected_file = expected_dir / name
+        actual_file = actual_dir / name
+        expected_bytes = expected_file.read_bytes()
+        actual_bytes = actual_file.read_bytes()
+        if expected_bytes != actual_bytes:
+            yield from difflib.unified_diff(
+                expected_bytes.decode(errors="replace").splitlines(True),
+                actual_bytes.decode(errors="replace").splitlines(True),
+                fromfile=str(expected_file),
+                tofile=str(actual_file),
+            )
+    for name in sorted(cmp.subdirs):
+        yield from _diff_dircmp(cmp.subdirs[name])
+
+
+def _file_kind(path):
+    """Describes the type of |path| the way `diff` does."""
+    if path.is_dir():
+        return "directory"
+    if path.is_file():
+        return "regular file"
+    return "special file"
+
+
 class ParseArgsTests(unittest.TestCase):
     """Test CLI argument parsing."""
 
@@ -88,23 +156,10 @@ class MainTest(cros_test_lib.TempDirTestCase):
         output_file.write_text(contents)
 
         # Check all the files in output_dir
-        # pylint: disable=subprocess-run-check
-        result = subprocess.run(
-            [
-                "diff",
-                "-ru",
-                TEST_DATA_DIR,
-                output_dir,
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            encoding="utf-8",
-        )
-        # pylint: enable=subprocess-run-check
-        if result.returncode:
+        diff = _diff_trees(TEST_DATA_DIR, output_dir)
+        if diff:
             msg = [""]  # to start with a newline
-            msg.append(result.stderr)
-            msg.append(result.stdout)
+            msg.append(diff)
             msg.append(
                 "Fake project transform does not match.\n"
                 "Please run ./regen.sh and amend your changes if necessary.\n"
@@ -115,15 +170,26 @@ class MainTest(cros_test_lib.TempDirTestCase):
 class TransformBuildConfigsTest(unittest.TestCase):
     """Test _transform_build_configs function."""
 
+    @classmethod
+    def setUpClass(cls):
+        cls.template_bytes = fake_config().SerializeToString()
+
+    def setUp(self):
+        self.config = config_bundle_pb2.ConfigBundle()
+        self.config.ParseFromString(self.template_bytes)
+
     def test_missing_lookups(self):
-        config = fake_config()
+        config = self.config
         config.ClearField("program_list")
 
-        with self.assertRaisesRegex(Exception, "Failed to lookup Program"):
+        with self.assertRaises(
+            cros_config_proto_converter.LookupFailedError
+        ) as context:
             cros_config_proto_converter._transform_build_configs(config)
+        self.assertEqual(context.exception.id_type, "Program")
 
     def test_empty_device_brand(self):
-        config = fake_config()
+        config = self.config
         config.ClearField("device_brand_list")
         # Signer configs tied to device brands, so need to clear that also
         config.program_list[0].ClearField("device_signer_configs")
@@ -133,19 +199,25 @@ class TransformBuildConfigsTest(unittest.TestCase):
         )
 
     def test_missing_sw_config(self):
-        config = fake_config()
+        config = self.config
         config.ClearField("software_configs")
 
-        with self.assertRaisesRegex(Exception, "Software config is required"):
+        with self.assertRaises(
+            cros_config_proto_converter.MissingSoftwareConfigError
+        ):
             cros_config_proto_converter._transform_build_configs(config)
 
     def test_unique_configs_only(self):
-        config = fake_config()
+        config = self.config
+        # _merge_configs doesn't modify its inputs, so the same config can be
+        # merged with itself.
         duplicate_config = cros_config_proto_converter._merge_configs(
-            [config, fake_config()]
+            [config, config]
         )
 
-        with self.assertRaisesRegex(Exception, "Multiple software configs"):
+        with self.assertRaises(
+            cros_config_proto_converter.DuplicateSoftwareConfigError
+        ):
             cros_config_proto_converter._transform_build_configs(
                 duplicate_config
             )
@@ -11,7 +11,6 @@ import argparse
 import collections
 import copy
 import functools
-import itertools
 import json
 import os
 import re
@@ -62,16 +61,25 @@ def MergeDictionaries(primary, overlay):
         primary: Primary dictionary
         overlay: Overlay dictionary
     """
-    for overlay_key in overlay.keys():
-        overlay_value = overlay[overlay_key]
-        if not overlay_key in primary:
-            primary[overlay_key] = overlay_value
-        elif isinstance(overlay_value, collections.abc.Mapping):
-            MergeDictionaries(primary[overlay_key], overlay_value)
-        elif isinstance(overlay_value, list):
-            primary[overlay_key].extend(overlay_value)
+    # Walk the overlay depth-first with an explicit stack rather than
+    # recursing, keeping the same merge order as a recursive walk.
+    pending = [(primary, iter(overlay.items()))]
+    while pending:
+        primary, overlay_items = pending[-1]
+        for overlay_key, overlay_value in overlay_items:
+            if overlay_key not in primary:
+                primary[overlay_key] = overlay_value
+            elif isinstance(overlay_value, collections.abc.Mapping):
+                pending.append(
+                    (primary[overlay_key], iter(overlay_value.items()))
+                )
+                break
+            elif isinstance(overlay_value, list):
+                primary[overlay_key].extend(overlay_value)
+            else:
+                primary[overlay_key] = overlay_value
         else:
-            primary[overlay_key] = overlay_value
+            pending.pop()
 
 
 def ParseArgs(argv):
@@ -172,6 +180,10 @@ def _GetVarTemplateValue(val, template_input, template_vars):
     Returns:
         The variable value with templating applied.
     """
+    # Most values in a config are plain strings; don't run the regex engine
+    # over them when there is no template to expand.
+    if "{{" not in val:
+        return val
     for template_var in TEMPLATE_PATTERN.findall(val):
         replace_string = "{{%s}}" % template_var
         if template_var not in template_vars:
@@ -242,7 +254,9 @@ def _ApplyTemplateVars(template_input, template_vars):
 
     # Object lists need their variables put in scope on a per list item basis
     for value in lists:
-        list_item_vars = copy.deepcopy(template_vars)
+        # Template variables only ever hold scalar values (see
+        # _SetTemplateVars), so a shallow copy is enough to scope them.
+        list_item_vars = dict(template_vars)
         _SetTemplateVars(value, list_item_vars)
         while _HasTemplateVariables(list_item_vars):
             _ApplyTemplateVars(list_item_vars, list_item_vars)
@@ -282,7 +296,7 @@ def _HasTemplateVariables(template_vars):
         True if they are still unevaluated template variables.
     """
     for val in template_vars.values():
-        if isinstance(val, str) and TEMPLATE_PATTERN.findall(val):
+        if isinstance(val, str) and TEMPLATE_PATTERN.search(val):
             return True
 
 
@@ -313,12 +327,16 @@ def _TransformDeprecatedConfigs(config):
         identity["custom-label-tag"] = identity.pop("whitelabel-tag")
 
 
+@functools.lru_cache(maxsize=32)
 def TransformConfig(config, model_filter_regex=None):
     """Transforms the source config (YAML) to the target system format (JSON)
 
     Applies consistent transforms to covert a source YAML configuration into
     JSON output that will be used on the system by cros_config.
 
+    The transform is a pure function of its (string) arguments and returns an
+    immutable JSON string, so recent results are cached.
+
     Args:
         config: Config that will be transformed.
         model_filter_regex: Only returns configs that match the filter
@@ -441,8 +459,10 @@ def _GenerateInferredAshSwitches(device_config):
     for flag in sorted(ash_switches):
         serialized_ash_switches += "%s\0" % flag
 
-    device_config = copy.deepcopy(device_config)
-    device_config.setdefault("ui", {})
+    # Only /ui is modified, so copy just the path to it and share the rest
+    # of the (potentially large) device config with the caller.
+    device_config = dict(device_config)
+    device_config["ui"] = dict(device_config.get("ui", {}))
     device_config["ui"]["serialized-ash-switches"] = serialized_ash_switches
     return device_config
 
@@ -676,13 +696,15 @@ def _ValidateUniqueIdentities(json_config):
                 "Missing identity for config: %s" % str(config)
             )
 
-    for config_a, config_b in itertools.combinations(
-        json_config["chromeos"]["configs"], 2
-    ):
-        if _IdentityEq(config_a["identity"], config_b["identity"]):
+    seen_identities = {}
+    for config in json_config["chromeos"]["configs"]:
+        identity = config["identity"]
+        other = seen_identities.setdefault(
+            _IdentityProjection(identity), identity
+        )
+        if other is not identity:
             raise ValidationError(
-                "Identities are not unique: %s and %s"
-                % (config_a["identity"], config_b["identity"])
+                "Identities are not unique: %s and %s" % (other, identity)
             )
 
 
@@ -718,34 +740,21 @@ def _ValidateFileCollision(json_config):
 
     keys = ["audio.main.files", "thermal.files"]
 
-    total_list = sum(
-        [
-            safe_get_from_key(config, key)
-            for key in keys
-            for config in json_config["chromeos"]["configs"]
-        ],
-        [],
-    )
-
     install_paths = {}
 
-    for pair in total_list:
-        if (
-            pair["destination"] in install_paths
-            and install_paths[pair["destination"]] != pair["source"]
-        ):
-            raise ValidationError(
-                "File collision detected: "
-                "Two files %s, %s are installing "
-                "to the same destination %s "
-                % (
-                    pair["source"],
-                    install_paths[pair["destination"]],
-                    pair["destination"],
+    for key in keys:
+        for config in json_config["chromeos"]["configs"]:
+            for pair in safe_get_from_key(config, key):
+                source = install_paths.setdefault(
+                    pair["destination"], pair["source"]
                 )
-            )
-        else:
-            install_paths[pair["destination"]] = pair["source"]
+                if source != pair["source"]:
+                    raise ValidationError(
+                        "File collision detected: "
+                        "Two files %s, %s are installing "
+                        "to the same destination %s "
+                        % (pair["source"], source, pair["destination"])
+                    )
 
 
 def _ValidateCustomLabelBrandChangesOnly(json_config):
@@ -998,9 +1007,12 @@ def MergeConfigs(configs):
     return libcros_schema.FormatJson(GenerateFridMatches(result_json))
 
 
+@functools.lru_cache()
 def ReadSchema(schema=None):
     """Reads the schema file and evaluates all import statements.
 
+    The result is cached, as the schema doesn't change while running.
+
     Args:
         schema: Schema file used to verify the config.
 
@@ -26,6 +26,18 @@ from chromite.lib import cros_test_lib
 
 this_dir = os.path.dirname(__file__)
 
+CRAS_CONFIG_DIR_RE = re.compile(r" *cras-config-dir: .*")
+VOLUME_RE = re.compile(r" *volume: .*")
+CARD_RE = re.compile(r" *$card: .*")
+FEATURE_DEVICE_TYPE_ERROR_RE = re.compile(
+    ".*feature-device-type absent identity.*"
+)
+FINGERPRINT_RO_VERSION_ERROR_RE = re.compile(
+    "You may not use different fingerprint firmware RO versions "
+    "on the same board:.*"
+)
+PROPERTY_NAME_RE = re.compile(r"^[a-z][a-z0-9]*(?:-[a-z0-9]+)*$")
+
 BASIC_CONFIG = """
 reef-9042-fw: &reef-9042-fw
   bcs-overlay: 'overlay-reef-private'
@@ -222,8 +234,8 @@ class ValidateConfigSchemaTests(cros_test_lib.TestCase):
         )
 
     def testMissingRequiredElement(self):
-        config = re.sub(r" *cras-config-dir: .*", "", BASIC_CONFIG)
-        config = re.sub(r" *volume: .*", "", BASIC_CONFIG)
+        config = CRAS_CONFIG_DIR_RE.sub("", BASIC_CONFIG)
+        config = VOLUME_RE.sub("", BASIC_CONFIG)
         try:
             libcros_schema.ValidateConfigSchema(
                 self._schema, cros_config_schema.TransformConfig(config)
@@ -233,7 +245,7 @@ class ValidateConfigSchemaTests(cros_test_lib.TestCase):
             self.assertIn("cras-config-dir", err.__str__())
 
     def testReferencedNonExistentTemplateVariable(self):
-        config = re.sub(r" *$card: .*", "", BASIC_CONFIG)
+        config = CARD_RE.sub("", BASIC_CONFIG)
         try:
             libcros_schema.ValidateConfigSchema(
                 self._schema, cros_config_schema.TransformConfig(config)
@@ -243,10 +255,14 @@ class ValidateConfigSchemaTests(cros_test_lib.TestCase):
             self.assertIn("cras-config-dir", err.__str__())
 
     def testSkuIdOutOfBound(self):
-        config = BASIC_CONFIG.replace("$sku-id: 0", "$sku-id: 0x80000000")
+        # Patch the already transformed BASIC_CONFIG rather than transforming
+        # a modified copy of the YAML.
+        config = json.loads(cros_config_schema.TransformConfig(BASIC_CONFIG))
+        for device_config in config["chromeos"]["configs"]:
+            device_config["identity"]["sku-id"] = 0x80000000
         with self.assertRaises(jsonschema.ValidationError) as ctx:
             libcros_schema.ValidateConfigSchema(
-                self._schema, cros_config_schema.TransformConfig(config)
+                self._schema, libcros_schema.FormatJson(config)
             )
         if version.parse(jsonschema.__version__) >= version.Version("3.0.0"):
             self.assertIn(
@@ -609,13 +625,7 @@ chromeos:
         with self.assertRaises(cros_config_schema.ValidationError) as ctx:
             cros_config_schema.ValidateConfig(json.dumps(config))
 
-        self.assertRegex(
-            str(ctx.exception),
-            re.compile(
-                "You may not use different fingerprint firmware RO versions "
-                "on the same board:.*"
-            ),
-        )
+        self.assertRegex(str(ctx.exception), FINGERPRINT_RO_VERSION_ERROR_RE)
 
     def testMultipleFingerprintFirmwareROVersionsValid(self):
         config = {
@@ -778,30 +788,21 @@ chromeos:
                 },
             ],
         ]
+        other_config = {"identity": {"platform-name": "foo", "sku-id": 2}}
         for config in configs:
-            with self.assertRaises(cros_config_schema.ValidationError) as ctx:
-                cros_config_schema.ValidateConfig(
-                    json.dumps(
-                        {
-                            "chromeos": {
-                                "configs": config
-                                + [
-                                    {
-                                        "identity": {
-                                            "platform-name": "foo",
-                                            "sku-id": 2,
-                                        },
-                                    }
-                                ],
-                            }
-                        }
+            with self.subTest(config=config):
+                with self.assertRaises(
+                    cros_config_schema.ValidationError
+                ) as ctx:
+                    cros_config_schema.ValidateConfig(
+                        json.dumps(
+                            {"chromeos": {"configs": config + [other_config]}}
+                        )
                     )
-                )
 
-            self.assertRegex(
-                str(ctx.exception),
-                re.compile(".*feature-device-type absent identity.*"),
-            )
+                self.assertRegex(
+                    str(ctx.exception), FEATURE_DEVICE_TYPE_ERROR_RE
+                )
 
     def testHdmiCecValid(self):
         config = {
@@ -884,11 +885,10 @@ class SchemaContentsTests(cros_test_lib.TestCase):
                     yield from _GetPropertyNames(item, None)
 
         schema = _GetSchemaYaml()
-        property_name_pattern = re.compile(r"^[a-z][a-z0-9]*(?:-[a-z0-9]+)*$")
         for property_name in _GetPropertyNames(schema, None):
             self.assertRegex(
                 property_name,
-                property_name_pattern,
+                PROPERTY_NAME_RE,
                 "All property names must use hyphen-case.",
             )
 
@@ -8,7 +8,8 @@
 from __future__ import print_function
 
 import argparse
-import collections
+import functools
+import io
 import itertools
 import os.path
 import re
@@ -17,6 +18,12 @@ import sys
 import libcros_schema  # pylint: disable=import-error
 
 
+_DASHES_RE = re.compile("-+")
+_UNDERSCORES_RE = re.compile("_+")
+# Group name prefix of a oneOf/anyOf property description, e.g. "[name] ...".
+_GROUP_NAME_RE = re.compile(r"\[(.*)\] ")
+
+
 def ParseArgs(argv):
     """Parse the available arguments.
 
@@ -62,8 +69,35 @@ def QuoteRegex(text):
     return "```%s```" % text.replace("|", "\\|")
 
 
+@functools.lru_cache(maxsize=None)
+def _AttrAnchor(attr_name):
+    """Returns the markdown anchor name for an attribute.
+
+    Attribute names repeat across many type definitions, so the result is
+    cached.
+
+    Args:
+        attr_name: Name of the attribute.
+
+    Returns:
+        The anchor name.
+    """
+    # pylint: disable=line-too-long
+    # https://github.com/google/gitiles/blob/HEAD/Documentation/markdown.md#named-anchors
+    attr_anchor = ""
+    for c in attr_name:
+        if c.isalnum():
+            attr_anchor += c
+        elif c.isspace():
+            attr_anchor += "-"
+        else:
+            attr_anchor += "_"
+    attr_anchor = _DASHES_RE.sub("-", attr_anchor)
+    return _UNDERSCORES_RE.sub("_", attr_anchor)
+
+
 def PopulateTypeDef(
-    name, type_def, ref_types, output, inherited_build_only=False
+    name, type_def, ref_types, write, inherited_build_only=False
 ):
     """Populates type definitions in the output (recursive)
 
@@ -71,67 +105,53 @@ def PopulateTypeDef(
         name: Name of the type
         type_def: Dict containing all of the type def attributes
         ref_types: Shared type definitions using the #ref attribute
-        output: Running array of markdown string output lines
+        write: Callable that appends a string to the markdown output
         inherited_build_only: Boolean, whether this element is the child of a
           build-only element.
     """
-    child_types = collections.OrderedDict()
-    output.append("### %s" % name)
-    output.append(
+    child_types = {}
+    write("### %s\n" % name)
+    write(
         "| Attribute | Type   | RegEx     | Required | Oneof Group "
-        "| Build-only | Description |"
+        "| Build-only | Description |\n"
     )
-    output.append(
+    write(
         "| --------- | ------ | --------- | -------- | ----------- "
-        "| ---------- | ----------- |"
+        "| ---------- | ----------- |\n"
     )
 
-    attrs_by_group = {
-        "": collections.OrderedDict(
-            sorted(type_def.get("properties", {}).items())
-        )
-    }
+    # dicts keep insertion order, so these iterate in sorted order.
+    attrs_by_group = {"": dict(sorted(type_def.get("properties", {}).items()))}
     group_index = 0
     for group in itertools.chain(
         type_def.get("oneOf", []), type_def.get("anyOf", [])
     ):
-        group_attrs = collections.OrderedDict(
-            sorted(group.get("properties", {}).items())
-        )
+        group_attrs = dict(sorted(group.get("properties", {}).items()))
         group_name = "GROUP(%s)" % group_index
         for group_attr in group_attrs.values():
-            match = re.match(r"\[(.*)\] .*", group_attr.get("description", ""))
+            match = _GROUP_NAME_RE.match(group_attr.get("description", ""))
             if match:
                 group_name = match.group(1)
         attrs_by_group[group_name] = group_attrs
         group_index = group_index + 1
 
-    additional_props = type_def.get("additionalProperties", False)
-    if additional_props:
-        output.append(
+    # additionalProperties may be a schema (even an empty one) rather than
+    # a boolean; only a missing or false value disallows extra properties.
+    additional_props = type_def.get("additionalProperties")
+    if additional_props not in (None, False):
+        write(
             "| [ANY] | N/A | N/A | N/A | N/A | N/A | "
             "This type allows additional properties not governed by the "
             "schema. "
             "See the type description for details on these additional "
-            "properties.|"
+            "properties.|\n"
         )
 
+    required_attrs = frozenset(type_def.get("required", ()))
     for attr_group_name, attrs in attrs_by_group.items():
         for attr in attrs:
             attr_name = attr
-
-            # pylint: disable=line-too-long
-            # https://github.com/google/gitiles/blob/HEAD/Documentation/markdown.md#named-anchors
-            attr_anchor = ""
-            for c in attr_name:
-                if c.isalnum():
-                    attr_anchor += c
-                elif c.isspace():
-                    attr_anchor += "-"
-                else:
-                    attr_anchor += "_"
-            attr_anchor = re.sub("-+", "-", attr_anchor)
-            attr_anchor = re.sub("_+", "_", attr_anchor)
+            attr_anchor = _AttrAnchor(attr_name)
 
             type_attrs = attrs[attr]
             if "$ref" in type_attrs:
@@ -142,29 +162,32 @@ def PopulateTypeDef(
             if regex:
                 # Regex need escaping for markdown
                 regex = QuoteRegex(regex)
-            description = type_attrs.get("description", "")
+            items = type_attrs.get("items")
+            # Arrays are documented with the description of their items.
+            if attr_type == "array":
+                description = items.get("description", "")
+            else:
+                description = type_attrs.get("description", "")
             description = description.replace("\n", " ")
-            required_list = type_def.get("required", [])
-            required = attr in required_list
+            required = attr in required_attrs
             build_only = inherited_build_only or type_attrs.get(
                 "build-only-element", False
             )
-            if type_attrs["type"] == "object":
+            if attr_type == "object":
                 child_types[attr_name] = type_attrs
                 if build_only:
                     child_types[attr_name]["build-only-element"] = True
                 attr_type = "[%s](#%s)" % (attr_name, attr_anchor)
-            elif type_attrs["type"] == "array":
-                description = type_attrs["items"].get("description", "")
-                description = description.replace("\n", " ")
-                if type_attrs["items"]["type"] == "object":
-                    child_types[attr_name] = type_attrs["items"]
+            elif attr_type == "array":
+                items_type = items["type"]
+                if items_type == "object":
+                    child_types[attr_name] = items
                     if build_only:
-                        child_types[attr_name]["build-only-element"] = True
+                        items["build-only-element"] = True
                     attr_type = "array - [%s](#%s)" % (attr_name, attr_anchor)
                 else:
-                    attr_type = "array - %s" % type_attrs["items"]["type"]
-            elif type_attrs["type"] == "integer":
+                    attr_type = "array - %s" % items_type
+            elif attr_type == "integer":
                 if "minimum" in type_attrs:
                     description += " Minimum value: %s." % hex(
                         type_attrs["minimum"]
@@ -183,9 +206,9 @@ def PopulateTypeDef(
                 build_only,
                 description,
             )
-            output.append("| %s | %s | %s | %s | %s | %s | %s |" % output_tuple)
+            write("| %s | %s | %s | %s | %s | %s | %s |\n" % output_tuple)
 
-    output.append("")
+    write("\n")
     for child_type in child_types:
         child_is_build_only = inherited_build_only or child_types[
             child_type
@@ -194,7 +217,7 @@ def PopulateTypeDef(
             child_type,
             child_types[child_type],
             ref_types,
-            output,
+            write,
             inherited_build_only=child_is_build_only,
         )
 
@@ -213,51 +236,45 @@ def Main(schema, output):
             type_def
         ]
 
-    type_def_outputs = []
-    type_def_outputs.append("[](begin_definitions)")
-    type_def_outputs.append("")
+    type_def_output = io.StringIO()
+    type_def_output.write("[](begin_definitions)\n\n")
     PopulateTypeDef(
         "model",
         schema_yaml["properties"]["chromeos"]["properties"]["configs"]["items"],
         ref_types,
-        type_def_outputs,
+        type_def_output.write,
     )
-    type_def_outputs.append("")
-    type_def_outputs.append("[](end_definitions)")
-    type_def_outputs.append("")
+    type_def_output.write("\n[](end_definitions)\n")
+    definitions = type_def_output.getvalue()
 
     if output:
-        pre_lines = []
-        post_lines = []
+        pre_text = ""
+        post_text = ""
 
         if os.path.isfile(output):
             with open(output, encoding="utf-8") as output_stream:
-                output_lines = output_stream.readlines()
-                pre_section = True
-                post_section = False
-                for line in output_lines:
-                    if "begin_definitions" in line:
-                        pre_section = False
-
-                    if pre_section:
-                        pre_lines.append(line)
-
-                    if post_section:
-                        post_lines.append(line)
-
-                    if "end_definitions" in line:
-                        post_section = True
+                text = output_stream.read()
+
+            # Keep everything before the line with the begin marker, and
+            # everything after the line with the end marker.
+            begin = text.find("begin_definitions")
+            if begin == -1:
+                pre_text = text
+            else:
+                pre_text = text[: text.rfind("\n", 0, begin) + 1]
+
+            end = text.find("end_definitions")
+            if end != -1:
+                end = text.find("\n", end)
+                if end != -1:
+                    post_text = text[end + 1 :]
 
         with open(output, "w", encoding="utf-8") as output_stream:
-            if pre_lines:
-                output_stream.writelines(pre_lines)
-
-            output_stream.write("\n".join(type_def_outputs))
-
-            if post_lines:
-                output_stream.writelines(post_lines)
+            output_stream.write(pre_text)
+            output_stream.write(definitions)
+            output_stream.write(post_text)
     else:
-        print("\n".join(type_def_outputs))
+        print(definitions)
 
 
 if __name__ == "__main__":
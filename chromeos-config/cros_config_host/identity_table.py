@@ -15,6 +15,9 @@ HEADER_FORMAT = "<LL"
 # sku match, custom label match, firmware manifest name
 ENTRY_FORMAT = "<LLLLL"
 
+_HEADER_STRUCT = struct.Struct(HEADER_FORMAT)
+_ENTRY_STRUCT = struct.Struct(ENTRY_FORMAT)
+
 
 class EntryFlags(enum.Enum):
     """The flags used at the beginning of each entry."""
@@ -43,32 +46,40 @@ def WriteIdentityStruct(config, output_file):
         output_file: A file-like object to write to, opened in binary mode.
     """
     device_configs = config["chromeos"]["configs"]
-    string_table = []
+    # Maps each string (as written) to its byte offset from the base of
+    # the string table, in insertion order.
+    string_table = {}
+    string_table_size = 0
 
     # Add a string to the table if it does to exist. Return the number
     # of bytes offset the string will live from the base of the string
     # table.
     def _StringTableIndex(string):
+        nonlocal string_table_size
+
         if string is None:
             return 0
 
         string = string.lower()
         string = string.encode("utf-8") + b"\000"
-        if string not in string_table:
-            string_table.append(string)
-
-        index = 0
-        for entry in string_table:
-            if entry == string:
-                return index
-            index += len(entry)
-
-    # Write the header of the struct.
-    output_file.write(
-        struct.pack(HEADER_FORMAT, STRUCT_VERSION, len(device_configs))
+        index = string_table.get(string)
+        if index is None:
+            index = string_table_size
+            string_table[string] = index
+            string_table_size += len(string)
+        return index
+
+    # The header and entries have a fixed size, so pack them into a single
+    # buffer and write it out with the string table in one go.
+    buf = bytearray(
+        _HEADER_STRUCT.size + len(device_configs) * _ENTRY_STRUCT.size
     )
 
-    # Write each of the entry structs.
+    # Pack the header of the struct.
+    _HEADER_STRUCT.pack_into(buf, 0, STRUCT_VERSION, len(device_configs))
+    offset = _HEADER_STRUCT.size
+
+    # Pack each of the entry structs.
     for device_config in device_configs:
         identity_info = device_config.get("identity", {})
         firmware_manifest_key = device_config.get("firmware", {}).get(
@@ -93,16 +104,16 @@ def WriteIdentityStruct(config, output_file):
             flags |= EntryFlags.HAS_CUSTOM_LABEL_TAG.value
             custom_label_match = identity_info["custom-label-tag"]
 
-        output_file.write(
-            struct.pack(
-                ENTRY_FORMAT,
-                flags,
-                _StringTableIndex(frid_match),
-                sku_id,
-                _StringTableIndex(custom_label_match),
-                _StringTableIndex(firmware_manifest_key),
-            )
+        _ENTRY_STRUCT.pack_into(
+            buf,
+            offset,
+            flags,
+            _StringTableIndex(frid_match),
+            sku_id,
+            _StringTableIndex(custom_label_match),
+            _StringTableIndex(firmware_manifest_key),
         )
+        offset += _ENTRY_STRUCT.size
 
-    for entry in string_table:
-        output_file.write(entry)
+    buf += b"".join(string_table)
+    output_file.write(buf)
@@ -10,14 +10,23 @@ Provides common cros_config and cros_config_test schema functions.
 from __future__ import print_function
 
 import collections
+import functools
 import json
 import os
 import re
 
-from jsonschema import validate  # pylint: disable=import-error
+from jsonschema import exceptions  # pylint: disable=import-error
+from jsonschema import validators  # pylint: disable=import-error
 import yaml  # pylint: disable=import-error
 
 
+# Prefer libyaml, as it's significantly faster than the default Python loader,
+# but fallback to the Python loader when unavailable.  While libyaml is
+# available in the chroot, this supports execution in non-chroot environments
+# like LUCI builders.
+_YAML_LOADER = yaml.CSafeLoader if yaml.__with_libyaml__ else yaml.SafeLoader
+
+
 def FormatJson(config):
     """Formats JSON for output or printing.
 
@@ -37,17 +46,7 @@ def LoadYaml(stream):
     Returns:
         A Python object which corresponds to the YAML source.
     """
-
-    # Prefer libyaml, as it's significantly faster than the default
-    # Python loader, but fallback to the Python loader when unavailable.
-    # While libyaml is available in the chroot, this supports execution
-    # in non-chroot environments like LUCI builders.
-    if yaml.__with_libyaml__:
-        loader = yaml.CSafeLoader
-    else:
-        loader = yaml.SafeLoader
-
-    return yaml.load(stream, Loader=loader)
+    return yaml.load(stream, Loader=_YAML_LOADER)
 
 
 def ValidateConfigSchema(schema, config):
@@ -60,8 +59,28 @@ def ValidateConfigSchema(schema, config):
         config: Config (transformed) that will be verified.
     """
     json_config = json.loads(config)
+    # Same as jsonschema.validate, but reuses the validator for the schema.
+    error = exceptions.best_match(
+        _GetSchemaValidator(schema).iter_errors(json_config)
+    )
+    if error is not None:
+        raise error
+
+
+@functools.lru_cache()
+def _GetSchemaValidator(schema):
+    """Returns a validator for the given schema, checking the schema itself.
+
+    Building the validator requires parsing and checking the schema, so it's
+    only done once per schema.
+
+    Args:
+        schema: Source schema (YAML) the validator checks against.
+    """
     schema_json = LoadYaml(schema)
-    validate(json_config, schema_json)
+    validator_class = validators.validator_for(schema_json)
+    validator_class.check_schema(schema_json)
+    return validator_class(schema_json)
 
 
 def FindImports(config_file, includes):
@@ -18,6 +18,9 @@ PREF_DEF_FILE = os.path.join(
 )
 PREF_DEFAULTS_DIR = os.path.join(THIS_DIR, "../../power_manager/default_prefs")
 
+# Matches pref name definitions, e.g. 'const char kFooPref[] = "foo";'.
+PREF_NAME_RE = re.compile(r'const char .*?Pref.. =[ \n] *"([^"]*)";')
+
 
 def ParseArgs(argv):
     """Parse the available arguments.
@@ -60,9 +63,7 @@ powerd_prefs: &powerd_prefs"""
 
     with open(PREF_DEF_FILE, "r", encoding="utf-8") as defs_stream:
         defs_content = defs_stream.read()
-        prefs = re.findall(
-            r'const char .*Pref.. =[ |\n] *"(.*)";', defs_content, re.MULTILINE
-        )
+        prefs = PREF_NAME_RE.findall(defs_content)
         for pref in prefs:
             default_pref_path = os.path.join(PREF_DEFAULTS_DIR, pref)
             pref_name = pref.replace("_", "-")
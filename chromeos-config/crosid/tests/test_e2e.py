@@ -4,6 +4,7 @@
 
 """Test the crosid tool end-to-end."""
 
+import io
 import shlex
 import struct
 import subprocess
@@ -43,6 +44,16 @@ def make_config(
     }
 
 
+def make_identity_table(configs):
+    """Serialize configs into the contents of an identity.bin file."""
+    configs_full = {"chromeos": {"configs": configs}}
+    output_file = io.BytesIO()
+    cros_config_host.identity_table.WriteIdentityStruct(
+        configs_full, output_file
+    )
+    return output_file.getvalue()
+
+
 def make_fake_sysroot(
     path,
     smbios_sku=None,
@@ -51,6 +62,7 @@ def make_fake_sysroot(
     fdt_frid=None,
     vpd_values=None,
     configs=(),
+    identity_table=None,
 ):
     smbios_sysfs_path = path / "sys" / "class" / "dmi" / "id"
     if smbios_sku is not None:
@@ -84,13 +96,11 @@ def make_fake_sysroot(
         for name, value in vpd_values.items():
             (vpd_sysfs_path / name).write_text(value)
 
-    configs_full = {"chromeos": {"configs": configs}}
+    if identity_table is None:
+        identity_table = make_identity_table(configs)
     config_path = path / "usr" / "share" / "chromeos-config"
     config_path.mkdir(exist_ok=True, parents=True)
-    with open(config_path / "identity.bin", "wb") as output_file:
-        cros_config_host.identity_table.WriteIdentityStruct(
-            configs_full, output_file
-        )
+    (config_path / "identity.bin").write_bytes(identity_table)
 
 
 REEF_CONFIGS = [
@@ -147,8 +157,13 @@ REEF_CONFIGS = [
 ]
 
 
-@pytest.mark.parametrize("config_idx", list(range(len(REEF_CONFIGS))))
-def test_reef(tmp_path, executable_path, config_idx):
+@pytest.fixture(name="reef_identity_table", scope="module")
+def fixture_reef_identity_table():
+    return make_identity_table(REEF_CONFIGS)
+
+
+@pytest.mark.parametrize("config_idx", range(len(REEF_CONFIGS)))
+def test_reef(tmp_path, executable_path, reef_identity_table, config_idx):
     cfg = REEF_CONFIGS[config_idx]
     identity = cfg["identity"]
     vpd = {}
@@ -162,7 +177,7 @@ def test_reef(tmp_path, executable_path, config_idx):
         acpi_frid=f"{identity['frid']}.1234_5678_910.1234.B",
         smbios_sku=identity.get("sku-id"),
         vpd_values=vpd,
-        configs=REEF_CONFIGS,
+        identity_table=reef_identity_table,
     )
 
     result = subprocess.run(
@@ -181,13 +196,13 @@ def test_reef(tmp_path, executable_path, config_idx):
     }
 
 
-def test_no_match(tmp_path, executable_path):
+def test_no_match(tmp_path, executable_path, reef_identity_table):
     # Test the case that no configs match (e.g., running wrong image
     # on device)
     make_fake_sysroot(
         tmp_path,
         acpi_frid="Google_Samus.1234_567_890.ohea",
-        configs=REEF_CONFIGS,
+        identity_table=reef_identity_table,
     )
 
     # pylint: disable=subprocess-run-check
@@ -207,7 +222,9 @@ def test_no_match(tmp_path, executable_path):
     }
 
 
-def test_both_customization_id_and_whitelabel(tmp_path, executable_path):
+def test_both_customization_id_and_whitelabel(
+    tmp_path, executable_path, reef_identity_table
+):
     # Having both a customization_id and custom_label_tag indicates the
     # RO VPD was tampered/corrupted, and should result in errors.
     make_fake_sysroot(
@@ -217,7 +234,7 @@ def test_both_customization_id_and_whitelabel(tmp_path, executable_path):
             "customization_id": "ACER-SAND",
             "whitelabel_tag": "some_wl",
         },
-        configs=REEF_CONFIGS,
+        identity_table=reef_identity_table,
     )
 
     # pylint: disable=subprocess-run-check
@@ -293,8 +310,13 @@ TROGDOR_CONFIGS = [
 ]
 
 
-@pytest.mark.parametrize("config_idx", list(range(len(TROGDOR_CONFIGS))))
-def test_trogdor(tmp_path, executable_path, config_idx):
+@pytest.fixture(name="trogdor_identity_table", scope="module")
+def fixture_trogdor_identity_table():
+    return make_identity_table(TROGDOR_CONFIGS)
+
+
+@pytest.mark.parametrize("config_idx", range(len(TROGDOR_CONFIGS)))
+def test_trogdor(tmp_path, executable_path, trogdor_identity_table, config_idx):
     cfg = TROGDOR_CONFIGS[config_idx]
     identity = cfg["identity"]
 
@@ -308,7 +330,7 @@ def test_trogdor(tmp_path, executable_path, config_idx):
         fdt_frid=f"{identity['frid']}.123_456",
         fdt_sku=identity.get("sku-id"),
         vpd_values=vpd,
-        configs=TROGDOR_CONFIGS,
+        identity_table=trogdor_identity_table,
     )
 
     result = subprocess.run(
@@ -327,12 +349,12 @@ def test_trogdor(tmp_path, executable_path, config_idx):
     }
 
 
-def test_frid_missing(tmp_path, executable_path):
+def test_frid_missing(tmp_path, executable_path, trogdor_identity_table):
     # When FRID is not available via ACPI or FDT, but required by all
     # configs, this should be an error.
     make_fake_sysroot(
         tmp_path,
-        configs=TROGDOR_CONFIGS,
+        identity_table=trogdor_identity_table,
     )
 
     # pylint: disable=subprocess-run-check
@@ -417,7 +439,9 @@ def test_corrupted_identity_table(tmp_path, executable_path, contents):
         "SKU8\n",
     ],
 )
-def test_corrupted_sku_x86(tmp_path, executable_path, contents):
+def test_corrupted_sku_x86(
+    tmp_path, executable_path, reef_identity_table, contents
+):
     # Test with a corrupted SKU file that we won't match a specific
     # SKU.
     make_fake_sysroot(
@@ -427,7 +451,7 @@ def test_corrupted_sku_x86(tmp_path, executable_path, contents):
         vpd_values={
             "customization_id": "MORGAN-SNAPPY",
         },
-        configs=REEF_CONFIGS,
+        identity_table=reef_identity_table,
     )
 
     sku_file = tmp_path / "sys" / "class" / "dmi" / "id" / "product_sku"
@@ -457,14 +481,16 @@ def test_corrupted_sku_x86(tmp_path, executable_path, contents):
         b"\x00\x00\x00\x00\x00",
     ],
 )
-def test_corrupted_sku_arm(tmp_path, executable_path, contents):
+def test_corrupted_sku_arm(
+    tmp_path, executable_path, trogdor_identity_table, contents
+):
     # Test with a corrupted SKU file that we won't match a specific
     # SKU.
     make_fake_sysroot(
         tmp_path,
         fdt_frid="Google_Lazor.123",
         fdt_sku=0,
-        configs=TROGDOR_CONFIGS,
+        identity_table=trogdor_identity_table,
     )
 
     sku_file = (
@@ -496,13 +522,15 @@ def test_corrupted_sku_arm(tmp_path, executable_path, contents):
         ("FIRMWARE_MANIFEST_KEY", "alan"),
     ],
 )
-def test_filter_output(tmp_path, executable_path, key, expected_result):
+def test_filter_output(
+    tmp_path, executable_path, reef_identity_table, key, expected_result
+):
     make_fake_sysroot(
         tmp_path,
         acpi_frid="Google_Snappy.123",
         smbios_sku=7,
         vpd_values={"customization_id": "DOLPHIN-ALAN"},
-        configs=REEF_CONFIGS,
+        identity_table=reef_identity_table,
     )
 
     result = subprocess.run(
@@ -517,13 +545,13 @@ def test_filter_output(tmp_path, executable_path, key, expected_result):
     assert result.stdout == expected_result
 
 
-def test_factory_override(tmp_path, executable_path):
+def test_factory_override(tmp_path, executable_path, trogdor_identity_table):
     """Test that the --sku-id and --custom-label-tag flags work."""
     make_fake_sysroot(
         tmp_path,
         fdt_frid="Google_Lazor.123_456",
         fdt_sku=3,
-        configs=TROGDOR_CONFIGS,
+        identity_table=trogdor_identity_table,
     )
 
     result = subprocess.run(
@@ -17,23 +17,36 @@ cd "${HERE}"
 SRC="${HERE}/../.."
 export PYTHONPATH="${HERE}:${SRC}/config/python:${PYTHONPATH:-}"
 
-# Regen power manager prefs schema
+# Regen power manager prefs schema.  This must come first, as the
+# config schema imports it, which affects everything else below.
 python3 -m cros_config_host.power_manager_prefs_gen_schema \
         -o cros_config_host/power_manager_prefs_schema.yaml
 
-# Regen README (must come after power manager prefs, as this can
-# affect the schema content)
-python3 -m cros_config_host.generate_schema_doc -o README.md
+# The remaining generators are independent of each other, so run them
+# in parallel.
+pids=()
+# Background jobs ignore SIGINT, so stop them explicitly if the script is
+# interrupted to keep them from writing into the tree afterwards.
+trap 'kill $(jobs -p) 2>/dev/null || true' EXIT
+trap 'exit 1' INT TERM
+run_bg() {
+    "$@" &
+    pids+=("$!")
+}
+
+# Regen README.
+run_bg python3 -m cros_config_host.generate_schema_doc -o README.md
 
-python3 -m cros_config_host.cros_config_schema -c test_data/test_import.yaml \
-        -o test_data/test_import.json
-python3 -m cros_config_host.cros_config_schema -o test_data/test_merge.json \
+run_bg python3 -m cros_config_host.cros_config_schema \
+        -c test_data/test_import.yaml -o test_data/test_import.json
+run_bg python3 -m cros_config_host.cros_config_schema \
+        -o test_data/test_merge.json \
         -m test_data/test_merge_base.yaml test_data/test_merge_overlay.yaml
-python3 -m cros_config_host.cros_config_schema -o test_data/test_build.json \
-        -m test_data/test.yaml
+run_bg python3 -m cros_config_host.cros_config_schema \
+        -o test_data/test_build.json -m test_data/test.yaml
 
 regen_test_data() {
-    python3 -m cros_config_host.cros_config_schema -f True \
+    run_bg python3 -m cros_config_host.cros_config_schema -f True \
             -c "test_data/${1}.yaml" -o "test_data/${1}.json"
 }
 
@@ -44,4 +57,12 @@ regen_test_data test_arm
 regen_test_data test
 
 # Regen proto_converter test data.
-python3 -m cros_config_host.cros_config_proto_converter --regen
+run_bg python3 -m cros_config_host.cros_config_proto_converter --regen
+
+# Wait on every job before reporting a failure, so that nothing is still
+# running once the script exits.
+ret=0
+for pid in "${pids[@]}"; do
+    wait "${pid}" || ret=1
+done
+exit "${ret}"
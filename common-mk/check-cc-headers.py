@@ -13,7 +13,7 @@ import argparse
 from pathlib import Path
 import re
 import sys
-from typing import Iterator, List, Optional, Tuple
+from typing import Iterator, List, Optional
 
 # pylint: disable=wrong-import-position
 import chromite_init  # pylint: disable=unused-import
@@ -57,14 +57,15 @@ ALLOWED_PREFIXES = frozenset(
     }
 )
 
-INCLUDE_RE: re.Pattern = re.compile(r"^#include\s*[\"<](\S*)[\">]")
+# Applied to whole files, so whitespace after #include must not span lines.
+INCLUDE_RE: re.Pattern = re.compile(
+    r"^#include[^\S\n]*[\"<](\S*)[\">]", re.MULTILINE
+)
 
 TOP_DIR = Path(__file__).resolve().parent.parent
 
 
-def get_lines_from_commit(
-    file: Path, commit: Optional[str]
-) -> Iterator[Tuple[int, str]]:
+def get_contents_from_commit(file: Path, commit: Optional[str]) -> str:
     """Reads the file data for |path| either from disk or git |commit|.
 
     Args:
@@ -74,33 +75,31 @@ def get_lines_from_commit(
                 command.
 
     Returns:
-        An iterator of (#, line) pairs added to file by the given commit.
+        The contents of the file.
     """
     if commit:
-        contents = git.GetObjectAtRev(None, f"./{file}", commit)
-    else:
-        contents = file.read_text(encoding="utf-8")
-
-    return enumerate(contents.splitlines(), start=1)
+        return git.GetObjectAtRev(None, f"./{file}", commit)
+    return file.read_text(encoding="utf-8")
 
 
-def check_include_for_full_path(
-    file: Path, lines: Iterator[Tuple[int, str]]
-) -> Iterator[str]:
+def check_include_for_full_path(file: Path, contents: str) -> Iterator[str]:
     """Checks to make sure every #include .h file has a full path.
 
     Args:
         file: Path of the file being processed.
-        lines: An iterator of [#, line] pairs from the file.
+        contents: The contents of the file.
 
     Yields:
         Error messages reporting incorrect #includes.
     """
 
-    for lineno, line in lines:
-        m = INCLUDE_RE.match(line)
-        if not m:
-            continue
+    # Only #include lines are visited; line numbers are counted
+    # incrementally from the previous match.
+    lineno = 1
+    pos = 0
+    for m in INCLUDE_RE.finditer(contents):
+        lineno += contents.count("\n", pos, m.start())
+        pos = m.start()
 
         header = Path(m.group(1))
         if header.suffix != ".h":
@@ -140,8 +139,8 @@ def check_files(files: List[Path], commit: Optional[str]) -> Iterator[str]:
             continue
         if not file.suffix in SUFFIXES_TO_VERIFY:
             continue
-        lines = get_lines_from_commit(file, commit)
-        yield from check_include_for_full_path(file, lines)
+        contents = get_contents_from_commit(file, commit)
+        yield from check_include_for_full_path(file, contents)
 
 
 def main(argv: Optional[List[str]] = None) -> int:
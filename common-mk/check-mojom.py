@@ -53,24 +53,62 @@ def GetRenameMap(from_commit, to_commit):
     return rename_map
 
 
-def GetFileContent(commit, file):
-    """Returns the content of a file in a commit."""
-    cmd = ["show", f"{commit}:{file}"]
-    res = git.RunGit(TOP_DIR, cmd, check=False)
-    return "" if res.returncode else res.stdout
+def GetFilesContent(objects):
+    """Returns the contents of the given "<commit>:<file>" objects.
+
+    All objects are read by a single `git cat-file --batch` process rather
+    than one `git show` per file. Objects that don't exist (e.g. a file added
+    or deleted by the commit) are returned as an empty string.
+    """
+    if not objects:
+        return []
+    cmd = ["git", "cat-file", "--batch=%(objectsize)"]
+    stdin = "".join(f"{obj}\n" for obj in objects).encode("utf-8")
+    res = cros_build_lib.run(
+        cmd, cwd=TOP_DIR, input=stdin, capture_output=True, print_cmd=False
+    )
+    # Each object is reported as "<size>\n<contents>\n", or as
+    # "<object> missing\n" or "<object> ambiguous\n" if it can't be resolved.
+    # The object name may itself contain spaces, so only the last field of
+    # the line can be relied on.
+    out = res.stdout
+    contents = []
+    pos = 0
+    for _ in objects:
+        end = out.index(b"\n", pos)
+        status = out[pos:end].rsplit(b" ", 1)[-1]
+        pos = end + 1
+        if status in (b"missing", b"ambiguous"):
+            contents.append("")
+            continue
+        size = int(status)
+        contents.append(out[pos : pos + size].decode("utf-8"))
+        pos += size + 1
+    return contents
 
 
 def CheckMojoStable(commit):
     """Checks if the mojom files follow the stable rules."""
     last_commit = f"{commit}^"
     rename_map = GetRenameMap(last_commit, commit)
+    changed_files = [
+        (rename_map.get(file, file), file)
+        for file in GetDiffFiles(last_commit, commit)
+        if file.endswith(".mojom")
+    ]
+    contents = iter(
+        GetFilesContent(
+            [
+                obj
+                for old_file, file in changed_files
+                for obj in (f"{last_commit}:{old_file}", f"{commit}:{file}")
+            ]
+        )
+    )
     delta = []
-    for file in GetDiffFiles(last_commit, commit):
-        if not file.endswith(".mojom"):
-            continue
-        old_file = rename_map.get(file, file)
-        old_file_content = GetFileContent(last_commit, old_file)
-        new_file_content = GetFileContent(commit, file)
+    for old_file, file in changed_files:
+        old_file_content = next(contents)
+        new_file_content = next(contents)
         if old_file != file:
             delta += [
                 {
@@ -17,11 +17,13 @@ files that are not included anywhere when a build file is modified.
 """
 
 import argparse
+import collections
+import functools
 import os
 from pathlib import Path
 from pathlib import PurePath
 import sys
-from typing import FrozenSet, Iterable, List, Optional, Tuple, Union
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
 
 
 _HACK_VAR_TO_DISABLE_ISORT = "hack"
@@ -52,6 +54,8 @@ class ProjectLiterals:
     def __init__(self, commit: str):
         # A map that saves project literals.
         self._literals: map = {}
+        # A map that saves the files of each project at the commit.
+        self._files: Dict[str, List[PurePath]] = {}
         self._commit: str = commit
 
     def GetLiterals(self, project: str) -> FrozenSet[PurePath]:
@@ -122,6 +126,27 @@ class ProjectLiterals:
             TOP_DIR / project, project / file_path, self._commit
         )
 
+    def _ListFiles(self, project: str) -> List[PurePath]:
+        """List all files in a project at the commit.
+
+        The listing is cached, as it is needed both to find gn files and to
+        find source files.
+
+        Args:
+            project: The project to list files in.
+
+        Returns:
+            A list of all files in the project.
+        """
+        if project not in self._files:
+            self._files[project] = [
+                f.name
+                for f in git.LsTree(TOP_DIR / project, self._commit)
+                if f.is_file
+            ]
+
+        return self._files[project]
+
     def _FindFilesEndingWith(
         self, project: str, suffix: Union[str, Tuple[str]]
     ) -> Iterable[PurePath]:
@@ -136,9 +161,7 @@ class ProjectLiterals:
             An iterable of all files ending with the given suffix.
         """
         yield from (
-            f.name
-            for f in git.LsTree(TOP_DIR / project, self._commit)
-            if f.is_file and f.name.name.endswith(suffix)
+            f for f in self._ListFiles(project) if f.name.endswith(suffix)
         )
 
     def _FindGnFiles(self, project: str) -> Iterable[PurePath]:
@@ -164,9 +187,12 @@ class ProjectLiterals:
         yield from self._FindFilesEndingWith(project, SOURCE_FILE_SUFFICES)
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def _GatherLiteralsFromGn(gn_data: str) -> List[dict]:
         """Gather all source file literals from a gn file.
 
+        Parsing shells out to `gn format`, so results are cached by content.
+
         Args:
             gn_data: The content of a gn file to gather literals from.
 
@@ -186,7 +212,9 @@ class ProjectLiterals:
 
 
 def CheckSourceFileIncludedInBuild(
-    commit: str, file_paths: Iterable[Union[str, os.PathLike]]
+    commit: str,
+    file_paths: Iterable[Union[str, os.PathLike]],
+    project_literals: Optional[ProjectLiterals] = None,
 ) -> bool:
     """Check that source files are included in builds.
 
@@ -194,6 +222,8 @@ def CheckSourceFileIncludedInBuild(
         commit: The commit to check in.
         file_paths: Files modified in this commit. Non-source files in this list
                     would be ignored.
+        project_literals: Literals gathered at |commit| to reuse. A new one is
+                          created if not given.
 
     Returns:
         True if source files are included in a *.gn file in the project
@@ -201,8 +231,11 @@ def CheckSourceFileIncludedInBuild(
     """
 
     ret = True
-    project_literals = ProjectLiterals(commit)
+    if project_literals is None:
+        project_literals = ProjectLiterals(commit)
 
+    # Group the files by project so per-project work is done only once.
+    paths_by_project = collections.defaultdict(list)
     for path in file_paths:
         path = PurePath(path)
         if not path.name.endswith(SOURCE_FILE_SUFFICES):
@@ -214,27 +247,34 @@ def CheckSourceFileIncludedInBuild(
             # List of files that don't need to be checked (e.g. examples).
             continue
 
-        project = path.parts[0]
+        paths_by_project[path.parts[0]].append(path)
+
+    for project, paths in paths_by_project.items():
         if not (Path(project) / "BUILD.gn").exists():
             # This project does not use gn.
             # We are trying to be conservative here, as we don't want to check
             # projects that only uses gn in a subdirectory.
             continue
-        if path not in project_literals.GetLiterals(project):
-            print(
-                f"{__file__}: {path} is not included in any "
-                f"*.gn files in {project}. "
-                "If you have added the file via an intermediate variable, "
-                "please ensure the source is set via source_set().",
-                file=sys.stderr,
-            )
-            ret = False
+
+        literals = project_literals.GetLiterals(project)
+        for path in paths:
+            if path not in literals:
+                print(
+                    f"{__file__}: {path} is not included in any "
+                    f"*.gn files in {project}. "
+                    "If you have added the file via an intermediate variable, "
+                    "please ensure the source is set via source_set().",
+                    file=sys.stderr,
+                )
+                ret = False
 
     return ret
 
 
 def CheckBuildFileIncludingAllSourceFiles(
-    commit: str, file_paths: Iterable[str]
+    commit: str,
+    file_paths: Iterable[str],
+    project_literals: Optional[ProjectLiterals] = None,
 ) -> bool:
     """Check that BUILD.gn files including all source files.
 
@@ -242,9 +282,12 @@ def CheckBuildFileIncludingAllSourceFiles(
         commit: The commit to check in.
         file_paths: Files modified in this commit. Non-build files in this list
                     would be ignored.
+        project_literals: Literals gathered at |commit| to reuse. A new one is
+                          created if not given.
     """
     ret = True
-    project_literals = ProjectLiterals(commit)
+    if project_literals is None:
+        project_literals = ProjectLiterals(commit)
 
     # Calling CheckSourceFileIncludedInBuild with all source files in that
     # project as parameter to examine if all source files are included.
@@ -256,6 +299,7 @@ def CheckBuildFileIncludingAllSourceFiles(
         if not CheckSourceFileIncludedInBuild(
             commit,
             (project / f for f in project_literals.FindSourceFiles(project)),
+            project_literals,
         ):
             ret = False
 
@@ -273,11 +317,16 @@ def get_parser():
 def main(argv: Optional[List[str]] = None) -> Optional[int]:
     parser = get_parser()
     opts = parser.parse_args(argv)
+    project_literals = ProjectLiterals(opts.commit)
     return (
         0
         if (
-            CheckSourceFileIncludedInBuild(opts.commit, opts.files)
-            and CheckBuildFileIncludingAllSourceFiles(opts.commit, opts.files)
+            CheckSourceFileIncludedInBuild(
+                opts.commit, opts.files, project_literals
+            )
+            and CheckBuildFileIncludingAllSourceFiles(
+                opts.commit, opts.files, project_literals
+            )
         )
         else 1
     )
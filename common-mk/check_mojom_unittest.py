@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# Copyright 2026 The ChromiumOS Authors
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+"""Unit tests for check-mojom.py"""
+
+import importlib
+from unittest import mock
+
+
+_HACK_VAR_TO_DISABLE_ISORT = "hack"
+
+# pylint: disable=wrong-import-position
+import chromite_init  # pylint: disable=unused-import
+
+from chromite.lib import cros_build_lib
+from chromite.lib import cros_test_lib
+
+
+check_mojom = importlib.import_module("check-mojom")
+
+
+class GetFilesContentTest(cros_test_lib.TempDirTestCase):
+    """Tests of check-mojom.GetFilesContent()."""
+
+    def setUp(self):
+        self.PatchObject(check_mojom, "TOP_DIR", self.tempdir)
+        self._git("init", "-q")
+        (self.tempdir / "a.mojom").write_text("module a;\n", encoding="utf-8")
+        (self.tempdir / "b c.mojom").write_text(
+            "module b;\n// missing\n", encoding="utf-8"
+        )
+        self._git("add", ".")
+        self._git(
+            "-c",
+            "user.name=test",
+            "-c",
+            "user.email=test@example.com",
+            "commit",
+            "-q",
+            "-m",
+            "initial",
+        )
+
+    def _git(self, *args):
+        cros_build_lib.run(
+            ["git", *args], cwd=self.tempdir, capture_output=True
+        )
+
+    def testNoObjects(self):
+        self.assertEqual(check_mojom.GetFilesContent([]), [])
+
+    def testExistingFiles(self):
+        self.assertEqual(
+            check_mojom.GetFilesContent(["HEAD:a.mojom", "HEAD:b c.mojom"]),
+            ["module a;\n", "module b;\n// missing\n"],
+        )
+
+    def testMissingFile(self):
+        self.assertEqual(
+            check_mojom.GetFilesContent(
+                ["HEAD:a.mojom", "HEAD:missing.mojom", "HEAD:b c.mojom"]
+            ),
+            ["module a;\n", "", "module b;\n// missing\n"],
+        )
+
+    def testMissingFileWithSpace(self):
+        self.assertEqual(
+            check_mojom.GetFilesContent(
+                ["HEAD:d e.mojom", "HEAD:a.mojom", "HEAD:f g h.mojom"]
+            ),
+            ["", "module a;\n", ""],
+        )
+
+    def testAmbiguousObject(self):
+        # Ambiguous short object names are hard to produce reliably, so fake
+        # the reply of git cat-file.
+        run_mock = self.PatchObject(cros_build_lib, "run")
+        run_mock.return_value = mock.Mock(
+            stdout=b"HEAD:d e ambiguous\n10\nmodule a;\n\n"
+        )
+        self.assertEqual(
+            check_mojom.GetFilesContent(["HEAD:d e", "HEAD:a.mojom"]),
+            ["", "module a;\n"],
+        )
+
+
+if __name__ == "__main__":
+    cros_test_lib.main(module=__name__)